@@ -1,7 +1,6 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 
 st.set_page_config(
     page_title="Electrolizador PEM",
@@ -9,6 +8,19 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ── TABLA DE DATOS ────────────────────────────────────────────────────────────
+def tabla_vacia():
+    return pd.DataFrame({
+        "Voltaje (V)":   [0.0]*15,
+        "Corriente (A)": [0.0]*15,
+    })
+
+
+def limpiar_tabla():
+    # Se ejecuta antes del rerun del botón, así no hace falta un st.rerun() extra
+    st.session_state.pop("tabla_editor", None)
+    st.session_state.tabla = tabla_vacia()
+
 # ── ESTADO 
 if "modelo_seleccionado" not in st.session_state:
     st.session_state.modelo_seleccionado = None
@@ -20,16 +32,21 @@ if "datos_experimentales" not in st.session_state:
     st.session_state.datos_experimentales = None
 
 if "tabla" not in st.session_state:
-    st.session_state.tabla = pd.DataFrame({
-        "Voltaje (V)":   [0.0]*15,
-        "Corriente (A)": [0.0]*15,
-    })
+    st.session_state.tabla = tabla_vacia()
 
 if "estado" not in st.session_state:
     st.session_state.estado = "stopped"
 
+# Aviso y texto de cada estado del proceso (también se usa como pie de la figura)
+ESTADOS = {
+    "running": (st.success, "▶️ Proceso en ejecución..."),
+    "paused":  (st.info,    "⏸️ Proceso en pausa..."),
+    "stopped": (st.warning, "⏹️ Proceso detenido."),
+}
+
 # ── CSS ───────────────────────────────────────────────────────────────────────
-st.markdown("""
+# Todas las reglas en un único bloque: un solo st.markdown por rerun.
+_CSS = """
 <style>
 .parameter-box {
     background:#f8fafc; border:2px solid #e2e8f0;
@@ -37,21 +54,33 @@ st.markdown("""
 }
 [data-testid="stMetricValue"] { font-size:16px !important; }
 [data-testid="stMetricLabel"] { font-size:13px !important; }
+.tabla-metricas { width:100%; border-collapse:collapse; }
+.tabla-metricas td { border:none; padding:0.35rem 0; }
+.tabla-metricas td:first-child { font-size:13px; color:#64748b; }
+.tabla-metricas td:last-child  { font-size:16px; text-align:right; }
+div[data-testid="column"]:nth-of-type(-n+3) button {
+    background-color: var(--btn-color) !important;
+    color: white !important;
+}
+div[data-testid="column"]:nth-of-type(1) button { --btn-color: #22c55e; }
+div[data-testid="column"]:nth-of-type(2) button { --btn-color: #3b82f6; }
+div[data-testid="column"]:nth-of-type(3) button { --btn-color: #ef4444; }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def cargar_imagen(ruta):
+    # Se lee una vez por proceso; si se reemplaza el PNG hay que reiniciar el servidor
+    with open(ruta, "rb") as f:
+        return f.read()
 
 # ── SIDEBAR ───────────────────────────────────────────────────────────────────
-st.sidebar.image("UCO.png", use_container_width=True)
+st.sidebar.image(cargar_imagen("UCO.png"), use_container_width=True)
 st.sidebar.markdown("### Parámetros de Control")
 st.sidebar.markdown("**Ingreso de datos experimentales**")
 
-if st.sidebar.button("🔄 Limpiar tabla"):
-    st.session_state.pop("tabla_editor", None)
-    st.session_state.tabla = pd.DataFrame({
-        "Voltaje (V)":   [0.0]*15,
-        "Corriente (A)": [0.0]*15,
-    })
-    st.rerun()
+st.sidebar.button("🔄 Limpiar tabla", on_click=limpiar_tabla)
 
 df_editado = st.sidebar.data_editor(
     st.session_state.tabla,
@@ -105,10 +134,21 @@ if st.session_state.modelo_seleccionado == "Ley de Faraday":
     )
 
 # ── FUNCIÓN DE CÁLCULO ────────────────────────────────────────────────────────
+F              = 96485
+INV_2F         = 1.0 / (2 * F)
+INV_4F         = 1.0 / (4 * F)
+MOL_S_A_L_MIN  = 22.4 * 60      # mol/s → L/min en condiciones normales
+R              = 0.082057
+# H₂ teórico (L/min) por amperio en condiciones de referencia T = 298 K, P = 1 atm
+# (Vm = R·T/P), base de la eficiencia faradaica
+H2_TEO_POR_A   = R * 298.0 * 60 * INV_2F
+
+@st.cache_data(max_entries=64)
 def calcular_produccion(modelo, df, n_celdas=1, temperatura=298.0, presion=1.0):
-    F    = 96485
+    # Import diferido: scikit-learn solo se carga cuando se ajusta un modelo
+    from sklearn.linear_model import LinearRegression
+
     nf   = 0.95
-    R    = 0.082057
     V_TN = 1.23  # Voltaje termoneutral mínimo (V)
 
     V = df["Voltaje (V)"].values
@@ -128,13 +168,12 @@ def calcular_produccion(modelo, df, n_celdas=1, temperatura=298.0, presion=1.0):
         potencia = (V * I).mean()
 
         # Eficiencia faradaica: H2 real vs H2 teórico por Faraday
-        Vm      = (R * 298.0) / 1.0
-        h2_teo  = (I_mean) / (2 * F) * Vm * 60
+        h2_teo  = I_mean * H2_TEO_POR_A
         ef_faradaica = min((h2 / h2_teo) * 100, 100) if h2_teo > 0 else 0.0
 
     elif modelo == "Modelo de superficie":
         X_train = np.column_stack([V, I, V*I, V**2, I**2])
-        y_train = (I) / (2 * F) * 22.4 * 60
+        y_train = I * INV_2F * MOL_S_A_L_MIN
         reg = LinearRegression()
         reg.fit(X_train, y_train)
         X_new = np.array([[V_mean, I_mean, V_mean*I_mean, V_mean**2, I_mean**2]])
@@ -143,14 +182,13 @@ def calcular_produccion(modelo, df, n_celdas=1, temperatura=298.0, presion=1.0):
         potencia = (V * I).mean()
 
         # Eficiencia faradaica
-        Vm      = (R * 298.0) / 1.0
-        h2_teo  = (I_mean) / (2 * F) * Vm * 60
+        h2_teo  = I_mean * H2_TEO_POR_A
         ef_faradaica = min((h2 / h2_teo) * 100, 100) if h2_teo > 0 else 0.0
 
     elif modelo == "Ley de Faraday":
         Vm   = (R * temperatura) / presion
-        h2   = (n_celdas * I_mean) / (2 * F) * Vm * 60 * nf
-        o2   = (n_celdas * I_mean) / (4 * F) * Vm * 60 * nf
+        h2   = n_celdas * I_mean * INV_2F * Vm * 60 * nf
+        o2   = n_celdas * I_mean * INV_4F * Vm * 60 * nf
         potencia = (V * I).mean()
 
         # Eficiencia faradaica = nf (ya definida como 0.95)
@@ -162,36 +200,22 @@ def calcular_produccion(modelo, df, n_celdas=1, temperatura=298.0, presion=1.0):
 
     return h2, o2, potencia, consumo, eficiencia
 
+def encabezado(titulo):
+    st.markdown(f"""
+    <div class="parameter-box" style="text-align:center;">
+        <h3>{titulo}</h3>
+    </div>
+    """, unsafe_allow_html=True)
+
 # ── LAYOUT PRINCIPAL ──────────────────────────────────────────────────────────
 col1, col2, col3 = st.columns([0.7, 1.5, 1])
 
 # ── Columna central: SIEMPRE visible ──
 with col2:
-    st.markdown("""
-    <div class="parameter-box" style="text-align:center;">
-        <h3>Electrolizador PEM</h3>
-    </div>
-    """, unsafe_allow_html=True)
+    encabezado("Electrolizador PEM")
 
     col_a, col_b, col_c = st.columns(3)
 
-    st.markdown("""
-    <style>
-        div[data-testid="column"]:nth-of-type(1) button {
-            background-color: #22c55e !important;
-            color: white !important;
-        }
-        div[data-testid="column"]:nth-of-type(2) button {
-            background-color: #3b82f6 !important;
-            color: white !important;
-        }
-        div[data-testid="column"]:nth-of-type(3) button {
-            background-color: #ef4444 !important;
-            color: white !important;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
     if col_a.button("▶️ Iniciar"):
         st.session_state.estado = "running"
     if col_b.button("⏸️ Pausar"):
@@ -199,21 +223,9 @@ with col2:
     if col_c.button("⏹️ Detener"):
         st.session_state.estado = "stopped"
 
-    col_img1, col_img2, col_img3 = st.columns([0.5, 2, 0.5])
-    with col_img2:
-        if st.session_state.estado == "running":
-            st.image("fig.png", caption="▶️ Proceso en ejecución...", use_container_width=True)
-        elif st.session_state.estado == "paused":
-            st.image("fig.png", caption="⏸️ Proceso en pausa...", use_container_width=True)
-        else:
-            st.image("fig.png", caption="⏹️ Proceso detenido.", use_container_width=True)
-
-    if st.session_state.estado == "running":
-        st.success("▶️ Proceso en ejecución...")
-    elif st.session_state.estado == "paused":
-        st.info("⏸️ Proceso en pausa...")
-    else:
-        st.warning("⏹️ Proceso detenido.")
+    aviso, mensaje = ESTADOS[st.session_state.estado]
+    st.image(cargar_imagen("fig.png"), caption=mensaje, use_container_width=True)
+    aviso(mensaje)
 
     st.markdown("""
     <div style="background:#f0f9ff;padding:1rem;border-radius:8px;text-align:center;margin-top:1rem;">
@@ -224,22 +236,15 @@ with col2:
     """, unsafe_allow_html=True)
 
 # ── Columnas izquierda y derecha ──────────────────────────────────────────────
-if not st.session_state.modelo_seleccionado:
-    with col1:
-        st.markdown("""
-        <div class="parameter-box" style="text-align:center;">
-            <h3>Entradas</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.info("Selecciona un modelo para ver las entradas.")
+with col1:
+    encabezado("Entradas")
 
-    with col3:
-        st.markdown("""
-        <div class="parameter-box" style="text-align:center;">
-            <h3>Salidas</h3>
-        </div>
-        """, unsafe_allow_html=True)
-        st.info("Selecciona un modelo para ver los resultados.")
+with col3:
+    encabezado("Salidas")
+
+if not st.session_state.modelo_seleccionado:
+    col1.info("Selecciona un modelo para ver las entradas.")
+    col3.info("Selecciona un modelo para ver los resultados.")
 
 else:
     modelo_actual = st.session_state.modelo_seleccionado
@@ -249,30 +254,23 @@ else:
         modelo_actual, df, n_celdas, temperatura, presion
     )
 
-    with col1:
-        st.markdown("""
-        <div class="parameter-box" style="text-align:center;">
-            <h3>Entradas</h3>
-        </div>
-        """, unsafe_allow_html=True)
-
-        st.metric("Modelo",             modelo_actual)
-        st.metric("Voltaje promedio",   f"{df['Voltaje (V)'].mean():.3f} V")
-        st.metric("Corriente promedio", f"{df['Corriente (A)'].mean():.3f} A")
-        st.metric("Nº datos",           str(len(df)))
-
-        if modelo_actual == "Ley de Faraday":
-            st.metric("Celdas",      str(int(n_celdas)))
-            st.metric("Temperatura", f"{temperatura} K")
-            st.metric("Presión",     f"{presion} atm")
+    # Entradas en una sola tabla HTML: un único elemento en lugar de un st.metric por fila
+    entradas = [
+        ("Modelo",             modelo_actual),
+        ("Voltaje promedio",   f"{df['Voltaje (V)'].mean():.3f} V"),
+        ("Corriente promedio", f"{df['Corriente (A)'].mean():.3f} A"),
+        ("Nº datos",           str(len(df))),
+    ]
+    if modelo_actual == "Ley de Faraday":
+        entradas += [
+            ("Celdas",      str(int(n_celdas))),
+            ("Temperatura", f"{temperatura} K"),
+            ("Presión",     f"{presion} atm"),
+        ]
+    filas = "".join(f"<tr><td>{etiqueta}</td><td>{valor}</td></tr>" for etiqueta, valor in entradas)
+    col1.markdown(f'<table class="tabla-metricas">{filas}</table>', unsafe_allow_html=True)
 
     with col3:
-        st.markdown("""
-        <div class="parameter-box" style="text-align:center;">
-            <h3>Salidas</h3>
-        </div>
-        """, unsafe_allow_html=True)
-
         st.metric("Producción H₂", f"{h2:.4f} L/min")
         st.metric("Producción O₂", f"{o2:.4f} L/min")
         st.metric("Eficiencia global", f"{eficiencia:.1f} %")
@@ -94,6 +94,13 @@ def reiniciar():
 # FUNCIONES DE CÁLCULO
 # ══════════════════════════════════════════════════════════════════════════════
 
+F              = 96485          # C/mol
+INV_2F         = 1.0 / (2 * F)  # mol H₂ por C
+INV_4F         = 1.0 / (4 * F)  # mol O₂ por C
+SEG_POR_MIN    = 60             # 1/s → 1/min
+ML_POR_L       = 1000           # L → mL
+
+
 def _reg_lineal(I_arr, tasa_arr):
     n = len(I_arr)
     SX, SY = np.sum(I_arr), np.sum(tasa_arr)
@@ -108,7 +115,8 @@ def _modelo_superficie(V_arr, I_arr, tasa_arr):
     ones = np.ones(len(V_arr))
     X = np.column_stack([ones, V_arr, I_arr, V_arr * I_arr, V_arr**2, I_arr**2])
     Y = tasa_arr.reshape(-1, 1)
-    beta = np.linalg.inv(X.T @ X) @ X.T @ Y
+    # Ecuaciones normales resueltas directamente, sin formar la inversa explícita
+    beta = np.linalg.solve(X.T @ X, X.T @ Y)
     return beta.flatten(), X
 
 
@@ -123,9 +131,9 @@ def _nf_faraday(I_arr, tasa_arr, n_celdas, T, P):
         tasa_teo [mL/min] = n_celdas · (I/2F) [mol/s] · Vm [L/mol] · 60 [s/min] · 1000 [mL/L]
         tasa_real [mL/min] = tasa_arr  (dato experimental)
     """
-    R, F = 0.08314, 96485
+    R = 0.08314
     Vm = (R * T) / P                            # L/mol  ← sin ×1000
-    tasa_teo = n_celdas * (I_arr / (2 * F)) * Vm * 60 * 1000   # mL/min
+    tasa_teo = n_celdas * I_arr * INV_2F * Vm * SEG_POR_MIN * ML_POR_L   # mL/min
     tasa_real = tasa_arr                                          # mL/min
 
     nf_arr = np.where(tasa_teo > 0, tasa_real / tasa_teo, 0.0)
@@ -133,6 +141,13 @@ def _nf_faraday(I_arr, tasa_arr, n_celdas, T, P):
     return float(nf_arr.mean()), nf_arr, tasa_teo, tasa_real, Vm
 
 
+def limpiar_datos(data, incluir_cero=False):
+    data_limpia = data.dropna()
+    if incluir_cero:
+        return data_limpia[(data_limpia["corriente"] >= 0) & (data_limpia["voltaje"] >= 0)]
+    return data_limpia[(data_limpia["corriente"] > 0) & (data_limpia["voltaje"] > 0)]
+
+
 def _accuracy(pred, real):
     with np.errstate(divide='ignore', invalid='ignore'):
         err = np.where(real > 0, np.abs(pred - real) / real, 0.0)
@@ -140,8 +155,9 @@ def _accuracy(pred, real):
     return err, acc, float(err.mean()), float(acc.mean())
 
 
+@st.cache_data(max_entries=64)
 def calcular_produccion(modelo, data_limpia, n_celdas, T, P):
-    F, V_TN = 96485, 1.23
+    V_TN = 1.23
     I    = data_limpia["corriente"].values.astype(float)
     V    = data_limpia["voltaje"].values.astype(float)
     tasa = data_limpia["tasa"].values.astype(float)
@@ -177,8 +193,8 @@ def calcular_produccion(modelo, data_limpia, n_celdas, T, P):
     elif modelo == "Ley de Faraday":
         nf, nf_arr, tasa_teo, tasa_real, Vm = _nf_faraday(I, tasa, n_celdas, T, P)
         # tasa_teo y tasa_real ya están en mL/min → h2_arr y o2_arr en mL/min
-        h2_arr = n_celdas * nf_arr * (I / (2 * F)) * Vm * 60 * 1000   # mL/min
-        o2_arr = n_celdas * nf_arr * (I / (4 * F)) * Vm * 60 * 1000   # mL/min
+        h2_arr = n_celdas * nf_arr * I * INV_2F * Vm * SEG_POR_MIN * ML_POR_L   # mL/min
+        o2_arr = n_celdas * nf_arr * I * INV_4F * Vm * SEG_POR_MIN * ML_POR_L   # mL/min
 
         # CORRECCIÓN: asignar h2 y o2 para que consumo se calcule correctamente
         h2 = float(np.mean(h2_arr))
@@ -219,8 +235,7 @@ def calcular_produccion(modelo, data_limpia, n_celdas, T, P):
     return h2, o2, potencia, consumo, eficiencia, ef_far, ef_volt, coefs
 
 
-def h2_por_punto(modelo, I_val, V_val, coefs, n_celdas, T, P):
-    F = 96485
+def h2_por_punto(modelo, I_val, V_val, coefs, n_celdas):
     if modelo == "Regresión lineal":
         return max((coefs["β₀"] + coefs["β₁"] * I_val), 0.0)
     elif modelo == "Modelo de superficie":
@@ -230,7 +245,7 @@ def h2_por_punto(modelo, I_val, V_val, coefs, n_celdas, T, P):
         nf = coefs.get("nf", 0.0)
         Vm = coefs.get("Vm", 0.0)
         # Vm en L/mol → resultado en mL/min
-        return n_celdas * nf * (I_val / (2 * F)) * Vm * 60 * 1000
+        return n_celdas * nf * I_val * INV_2F * Vm * SEG_POR_MIN * ML_POR_L
     return 0.0
 
 
@@ -248,7 +263,7 @@ def _fmt(val):
 
 def _fmt_sci(val):
     base, exp_str = f"{val:.2e}".split('e')
-    return f"{float(base):.2f} \\times 10^{{{int(exp_str)}}}"
+    return f"{base} \\times 10^{{{int(exp_str)}}}"
 
 
 def latex_regresion_lineal(coefs):
@@ -275,22 +290,20 @@ def latex_superficie(coefs):
     )
 
 
-def latex_faraday(coefs, n_celdas, T, P):
-    F = 96485
+def latex_faraday(coefs, n_celdas):
     nf = coefs["nf"]
     Vm = coefs["Vm"]
     return (
         r"\text{Producción}_{H_2} \, \text{(mL/min)} = " +
-        f"{n_celdas} \\cdot {_fmt(nf)} \\cdot \\frac{{I}}{{2 \\cdot {F}}} \\cdot {_fmt(Vm)} \\cdot 60 \\cdot 1000"
+        f"{n_celdas} \\cdot {_fmt(nf)} \\cdot \\frac{{I}}{{2 \\cdot {F}}} \\cdot {_fmt(Vm)} \\cdot {SEG_POR_MIN} \\cdot {ML_POR_L}"
     )
 
 
 def latex_faraday_simplificada(coefs, n_celdas):
-    F = 96485
     nf = coefs["nf"]
     Vm = coefs["Vm"]
     # Vm en L/mol → ×1000 para mL/min
-    K = n_celdas * nf * Vm * 60 * 1000 / (2 * F)
+    K = n_celdas * nf * Vm * SEG_POR_MIN * ML_POR_L * INV_2F
     return (
         r"\text{Producción}_{H_2} \, \text{(mL/min)} = " +
         f"{_fmt(K)} \\cdot I"
@@ -399,6 +412,90 @@ def mostrar_eficiencia_modelo(modelo_actual, coefs, ef_far):
         )
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# HELPER: calculadora de punto de operación
+# ══════════════════════════════════════════════════════════════════════════════
+
+@st.fragment
+def calculadora_punto_operacion(modelo_actual, coefs, popt, I_exp, V_exp):
+    # Fragmento: cambiar el modo o el valor ingresado solo reejecuta la calculadora,
+    # no la barra lateral ni el resto del resumen.
+    st.markdown('<div class="seccion-titulo">Calculadora de punto de operación</div>', unsafe_allow_html=True)
+    st.write(
+        "Ingresa un valor de **corriente** o de **voltaje** para predecir el otro y "
+        "estimar la producción de H₂ con el modelo seleccionado."
+    )
+
+    modo_calc = st.radio(
+        "¿Qué variable quieres ingresar?",
+        ["Corriente (A) → obtener Voltaje y H₂",
+         "Voltaje (V) → obtener Corriente y H₂"],
+        horizontal=True,
+    )
+
+    h2_calc = 0.0
+    col_inp, col_out = st.columns(2)
+
+    if modo_calc.startswith("Corriente"):
+        I_usuario = col_inp.number_input(
+            "Corriente (A)", min_value=0.001,
+            value=float(np.mean(I_exp)), format="%.4f",
+        )
+
+        if popt is not None:
+            V_calc = modelo_pem_base(I_usuario, *popt)
+            col_out.metric("Voltaje optimizado (V) — modelo Paso 2", f"{_fmt(V_calc)}")
+        else:
+            V_calc = float(np.mean(V_exp))
+            col_out.info("Sin parámetros cinéticos; se usa voltaje promedio experimental.")
+
+        if coefs:
+            h2_calc = h2_por_punto(
+                modelo_actual, I_usuario, V_calc, coefs,
+                st.session_state.celdas,
+            )
+
+        st.metric("Producción de H₂ estimada (mL/min)", f"{h2_calc:.2f}")
+
+    else:  # Voltaje → Corriente
+        V_usuario = col_inp.number_input(
+            "Voltaje (V)", min_value=0.001,
+            value=float(np.mean(V_exp)), format="%.4f",
+        )
+
+        if popt is not None:
+            def ecuacion_a_resolver(I_var):
+                if I_var <= 0:
+                    return 1e6
+                return modelo_pem_base(I_var, *popt) - V_usuario
+
+            try:
+                I_seed = float(np.mean(I_exp))
+                I_calc_arr = fsolve(ecuacion_a_resolver, I_seed, full_output=True)
+                I_calc = float(I_calc_arr[0][0])
+                convergio = abs(ecuacion_a_resolver(I_calc)) < 1e-4
+
+                if convergio and I_calc > 0:
+                    col_out.metric("Corriente estimada (A) — modelo Paso 2", f"{_fmt(I_calc)}")
+                else:
+                    st.warning("No se pudo despejar la corriente para ese voltaje. Verifica que esté en rango.")
+                    I_calc = float(np.mean(I_exp))
+            except Exception:
+                st.warning("Error al despejar la corriente. Se usa valor medio experimental.")
+                I_calc = float(np.mean(I_exp))
+        else:
+            I_calc = float(np.mean(I_exp))
+            col_out.info("Sin parámetros cinéticos; se usa corriente promedio experimental.")
+
+        if coefs:
+            h2_calc = h2_por_punto(
+                modelo_actual, I_calc, V_usuario, coefs,
+                st.session_state.celdas,
+            )
+
+        st.metric("Producción de H₂ estimada (mL/min)", f"{h2_calc:.2f}")
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # Sidebar
 # ══════════════════════════════════════════════════════════════════════════════
@@ -438,28 +535,33 @@ if st.session_state.paso_actual == 1:
     st.header("Paso 1: Ingreso de datos")
     st.write("Ingresa los parámetros de la celda, las condiciones de experimentación y los datos experimentales.")
 
-    col1, col2, col3 = st.columns(3)
-    celdas      = col1.number_input("Número de celdas", min_value=1, value=st.session_state.celdas, format="%d", step=1)
-    temperatura = col2.number_input("Temperatura (K)", min_value=0.0, value=st.session_state.temperatura, max_value=313.0, format="%.2f", step=1.0)
-    presion     = col3.number_input("Presión atmosférica (atm)", min_value=-0.4, value=st.session_state.presion, max_value=40.0, format="%.2f", step=1.0)
-
-    st.info("⚠️ Se deben proporcionar mínimo 15 puntos medidos, bien distribuidos a lo largo del rango operativo.")
-
-    st.session_state.data.reset_index(drop=True, inplace=True)
-    data = st.data_editor(
-        st.session_state.data,
-        num_rows="dynamic",
-        hide_index=True,
-        column_config={
-            "voltaje":   st.column_config.NumberColumn("Voltaje (V)", format="%.2f"),
-            "corriente": st.column_config.NumberColumn("Corriente (A)", format="%.2f"),
-            "tasa":      st.column_config.NumberColumn("Tasa de producción H₂ (mL/min)", format="%.2f"),
-        },
-    )
+    # Formulario: los cambios en parámetros y tabla se aplican en un solo rerun al enviar
+    with st.form("ingreso_datos"):
+        col1, col2, col3 = st.columns(3)
+        celdas      = col1.number_input("Número de celdas", min_value=1, value=st.session_state.celdas, format="%d", step=1)
+        temperatura = col2.number_input("Temperatura (K)", min_value=0.0, value=st.session_state.temperatura, max_value=313.0, format="%.2f", step=1.0)
+        presion     = col3.number_input("Presión atmosférica (atm)", min_value=-0.4, value=st.session_state.presion, max_value=40.0, format="%.2f", step=1.0)
+
+        st.info("⚠️ Se deben proporcionar mínimo 15 puntos medidos, bien distribuidos a lo largo del rango operativo.")
+
+        st.session_state.data.reset_index(drop=True, inplace=True)
+        data = st.data_editor(
+            st.session_state.data,
+            num_rows="dynamic",
+            hide_index=True,
+            column_config={
+                "voltaje":   st.column_config.NumberColumn("Voltaje (V)", format="%.2f"),
+                "corriente": st.column_config.NumberColumn("Corriente (A)", format="%.2f"),
+                "tasa":      st.column_config.NumberColumn("Tasa de producción H₂ (mL/min)", format="%.2f"),
+            },
+        )
+
+        col1, col2, col3 = st.columns(3)
+        enviado = col3.form_submit_button("Guardar y Continuar ▶", type="primary")
 
-    # CORRECCIÓN: ingreso_datos() movida aquí como función local para acceder
-    # a las variables 'data', 'celdas', 'temperatura', 'presion' del scope correcto.
-    def ingreso_datos():
+    # Se evalúa tras el envío (no como on_click): un callback vería los valores
+    # del formulario de la ejecución anterior, no los recién enviados.
+    if enviado:
         if len(data.dropna()) < 15:
             st.warning("Ingresa al menos 15 mediciones válidas para continuar.")
         else:
@@ -468,9 +570,7 @@ if st.session_state.paso_actual == 1:
             st.session_state.presion = presion
             st.session_state.data = data.copy()
             st.session_state.paso_actual += 1
-
-    col1, col2, col3 = st.columns(3)
-    col3.button("Guardar y Continuar ▶", on_click=ingreso_datos, type="primary")
+            st.rerun()
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -480,8 +580,7 @@ elif st.session_state.paso_actual == 2:
     st.header("Paso 2: Optimización de cinéticas")
     st.write("Ajuste de parámetros cinéticos mediante el modelo de Butler-Volmer / Tafel con resistencia óhmica.")
 
-    data_limpia = st.session_state.data.dropna()
-    data_limpia = data_limpia[(data_limpia["corriente"] > 0) & (data_limpia["voltaje"] > 0)]
+    data_limpia = limpiar_datos(st.session_state.data)
     I_dat = data_limpia["corriente"].values
     V_dat = data_limpia["voltaje"].values
 
@@ -576,8 +675,7 @@ elif st.session_state.paso_actual == 3:
 
     else:
         modelo_actual = st.session_state.modelo_seleccionado
-        data_limpia   = st.session_state.data.dropna()
-        data_limpia   = data_limpia[(data_limpia["corriente"] >= 0) & (data_limpia["voltaje"] >= 0)]
+        data_limpia   = limpiar_datos(st.session_state.data, incluir_cero=True)
 
         h2, o2, potencia, consumo, eficiencia, ef_far, ef_volt, coefs = calcular_produccion(
             modelo_actual, data_limpia,
@@ -605,7 +703,7 @@ elif st.session_state.paso_actual == 3:
         elif modelo_actual == "Modelo de superficie":
             st.latex(r"\normalsize " + latex_superficie(coefs))
         elif modelo_actual == "Ley de Faraday":
-            st.latex(r"\Large " + latex_faraday(coefs, st.session_state.celdas, st.session_state.temperatura, st.session_state.presion))
+            st.latex(r"\Large " + latex_faraday(coefs, st.session_state.celdas))
 
         st.divider()
 
@@ -694,7 +792,6 @@ elif st.session_state.paso_actual == 3:
 
         # ── LEY DE FARADAY: múltiples gráficas con selector ──────────────────
         elif modelo_actual == "Ley de Faraday":
-            F_const    = 96485
             nf_mean    = coefs["nf"]
             nf_arr_exp = coefs["nf_arr"]
             Vm         = coefs["Vm"]
@@ -718,7 +815,7 @@ elif st.session_state.paso_actual == 3:
             if tipo_graf == "Producción H₂ vs Corriente":
                 I_lin  = np.linspace(I_s.min() * 0.9, I_s.max() * 1.1, 200)
                 # CORRECCIÓN: Vm en L/mol → ×1000 para mL/min
-                h2_lin = n_cel * nf_mean * (I_lin / (2 * F_const)) * Vm * 60 * 1000
+                h2_lin = n_cel * nf_mean * I_lin * INV_2F * Vm * SEG_POR_MIN * ML_POR_L
                 delta  = 0.05 * h2_lin
 
                 fig_f1 = go.Figure()
@@ -775,8 +872,8 @@ elif st.session_state.paso_actual == 3:
             # 3. H₂ y O₂ vs Corriente (doble eje)
             elif tipo_graf == "Producción H₂ y O₂ vs Corriente":
                 I_lin  = np.linspace(I_s.min() * 0.9, I_s.max() * 1.1, 200)
-                h2_lin = n_cel * nf_mean * (I_lin / (2 * F_const)) * Vm * 60 * 1000
-                o2_lin = n_cel * nf_mean * (I_lin / (4 * F_const)) * Vm * 60 * 1000
+                h2_lin = n_cel * nf_mean * I_lin * INV_2F * Vm * SEG_POR_MIN * ML_POR_L
+                o2_lin = n_cel * nf_mean * I_lin * INV_4F * Vm * SEG_POR_MIN * ML_POR_L
 
                 fig_f4 = make_subplots(specs=[[{"secondary_y": True}]])
                 fig_f4.add_trace(go.Scatter(
@@ -823,8 +920,7 @@ elif st.session_state.paso_actual == 4:
 
     popt          = st.session_state.get("popt", None)
     coefs         = st.session_state.get("coeficientes", {})
-    data_limpia   = st.session_state.data.dropna()
-    data_limpia   = data_limpia[(data_limpia["corriente"] > 0) & (data_limpia["voltaje"] > 0)]
+    data_limpia   = limpiar_datos(st.session_state.data)
     I_exp         = data_limpia["corriente"].values.astype(float)
     V_exp         = data_limpia["voltaje"].values.astype(float)
     modelo_actual = st.session_state.get("modelo_seleccionado", "No seleccionado")
@@ -854,80 +950,7 @@ elif st.session_state.paso_actual == 4:
 
     st.divider()
 
-    st.markdown('<div class="seccion-titulo">Calculadora de punto de operación</div>', unsafe_allow_html=True)
-    st.write(
-        "Ingresa un valor de **corriente** o de **voltaje** para predecir el otro y "
-        "estimar la producción de H₂ con el modelo seleccionado."
-    )
-
-    modo_calc = st.radio(
-        "¿Qué variable quieres ingresar?",
-        ["Corriente (A) → obtener Voltaje y H₂",
-         "Voltaje (V) → obtener Corriente y H₂"],
-        horizontal=True,
-    )
-
-    h2_calc = 0.0
-    col_inp, col_out = st.columns(2)
-
-    if modo_calc.startswith("Corriente"):
-        I_usuario = col_inp.number_input(
-            "Corriente (A)", min_value=0.001,
-            value=float(np.mean(I_exp)), format="%.4f",
-        )
-
-        if popt is not None:
-            V_calc = modelo_pem_base(I_usuario, *popt)
-            col_out.metric("Voltaje optimizado (V) — modelo Paso 2", f"{_fmt(V_calc)}")
-        else:
-            V_calc = float(np.mean(V_exp))
-            col_out.info("Sin parámetros cinéticos; se usa voltaje promedio experimental.")
-
-        if coefs:
-            h2_calc = h2_por_punto(
-                modelo_actual, I_usuario, V_calc, coefs,
-                st.session_state.celdas, st.session_state.temperatura, st.session_state.presion,
-            )
-
-        st.metric("Producción de H₂ estimada (mL/min)", f"{h2_calc:.2f}")
-
-    else:  # Voltaje → Corriente
-        V_usuario = col_inp.number_input(
-            "Voltaje (V)", min_value=0.001,
-            value=float(np.mean(V_exp)), format="%.4f",
-        )
-
-        if popt is not None:
-            def ecuacion_a_resolver(I_var):
-                if I_var <= 0:
-                    return 1e6
-                return modelo_pem_base(I_var, *popt) - V_usuario
-
-            try:
-                I_seed = float(np.mean(I_exp))
-                I_calc_arr = fsolve(ecuacion_a_resolver, I_seed, full_output=True)
-                I_calc = float(I_calc_arr[0][0])
-                convergio = abs(ecuacion_a_resolver(I_calc)) < 1e-4
-
-                if convergio and I_calc > 0:
-                    col_out.metric("Corriente estimada (A) — modelo Paso 2", f"{_fmt(I_calc)}")
-                else:
-                    st.warning("No se pudo despejar la corriente para ese voltaje. Verifica que esté en rango.")
-                    I_calc = float(np.mean(I_exp))
-            except Exception:
-                st.warning("Error al despejar la corriente. Se usa valor medio experimental.")
-                I_calc = float(np.mean(I_exp))
-        else:
-            I_calc = float(np.mean(I_exp))
-            col_out.info("Sin parámetros cinéticos; se usa corriente promedio experimental.")
-
-        if coefs:
-            h2_calc = h2_por_punto(
-                modelo_actual, I_calc, V_usuario, coefs,
-                st.session_state.celdas, st.session_state.temperatura, st.session_state.presion,
-            )
-
-        st.metric("Producción de H₂ estimada (mL/min)", f"{h2_calc:.2f}")
+    calculadora_punto_operacion(modelo_actual, coefs, popt, I_exp, V_exp)
 
     st.divider()
     c1, c2 = st.columns(2)